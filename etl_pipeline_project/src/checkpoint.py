@@ -0,0 +1,197 @@
+import os
+import time
+import uuid
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import ClientError
+
+import codec
+
+# Each stage keeps one manifest object describing its current run:
+#
+#   {"stage": ..., "run_id": ..., "state": "open" | "committed" | "done",
+#    "input_bucket": ..., "inputs": [keys], "sources": [work items, e.g. mints],
+#    "outputs": [{"bucket", "key", "source"}], "completed": [sources finished without an output],
+#    "attempts": {source: failures}, "failed": [sources given up on],
+#    "owner": ..., "updated_at": epoch seconds}
+#
+# Protocol: recover -> begin_run -> record_output (checkpoint after every part
+# file) -> commit_run (the commit point) -> consume_inputs. Inputs are only
+# deleted once the manifest says the run committed, so a crash at any point
+# either resumes the open run or finishes deleting inputs whose outputs are
+# already durable. Output keys are derived from run_id so replaying a run
+# overwrites instead of duplicating.
+#
+# Every manifest write is conditional on the ETag that was read (or on the
+# object not existing yet), so when several processes run the same stage only
+# one of them can own a run; the others get ManifestConflict before they touch
+# any inputs. An open run owned by someone else is left alone while its owner
+# keeps it fresh (heartbeat) and is taken over once it has been idle for
+# LEASE_SECONDS. The owner itself resumes it straight away; a parent process
+# passes its owner id to the stages it spawns (child_env) so a crashed child
+# run is resumed by the next child.
+#
+# S3 conditional writes need boto3/botocore >= 1.35.69.
+MANIFEST_PREFIX = "checkpoints/"
+LEASE_SECONDS = 900
+HEARTBEAT_SECONDS = LEASE_SECONDS // 3
+OWNER_ID = os.getenv("CHECKPOINT_OWNER") or uuid.uuid4().hex  # Identifies the run owner
+
+s3_client = boto3.client("s3")
+
+class ManifestConflict(Exception):
+    """Another process updated the stage manifest since it was read."""
+
+def child_env():
+    """Environment for a spawned stage so its runs share this process's owner id."""
+    return {**os.environ, "CHECKPOINT_OWNER": OWNER_ID}
+
+def manifest_key(stage):
+    return f"{MANIFEST_PREFIX}{stage}.json"
+
+def new_run_id():
+    # Timestamp first so run-keyed outputs sort by start time; the suffix keeps
+    # runs started in the same second apart.
+    return f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+def load_manifest(bucket, stage):
+    """Load a stage's manifest, or an idle one if the stage never ran."""
+    key = manifest_key(stage)
+    try:
+        obj = s3_client.get_object(Bucket=bucket, Key=key)
+        manifest = codec.loads(obj["Body"].read())
+        manifest["etag"] = obj["ETag"]
+    except s3_client.exceptions.NoSuchKey:
+        manifest = {"stage": stage, "run_id": None, "state": "done",
+                    "input_bucket": None, "inputs": [], "outputs": [], "completed": [],
+                    "etag": None}
+    manifest["bucket"] = bucket
+    return manifest
+
+def save_manifest(manifest):
+    """Write the manifest if nobody else changed it since it was read."""
+    manifest["owner"] = OWNER_ID
+    manifest["updated_at"] = time.time()
+    body = {k: v for k, v in manifest.items() if k not in ("bucket", "etag")}
+    params = {
+        "Bucket": manifest["bucket"],
+        "Key": manifest_key(manifest["stage"]),
+        "Body": codec.dumps(body),
+        "ContentType": "application/json",
+    }
+    if manifest.get("etag"):
+        params["IfMatch"] = manifest["etag"]
+    else:
+        params["IfNoneMatch"] = "*"
+    try:
+        response = s3_client.put_object(**params)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("PreconditionFailed", "ConditionalRequestConflict"):
+            raise ManifestConflict(
+                f"{manifest['stage']} manifest was updated by another process"
+            ) from e
+        raise
+    manifest["etag"] = response["ETag"]
+
+def begin_run(manifest, input_bucket, input_keys, sources=None):
+    """Open a new run over input_keys on an idle manifest returned by recover().
+
+    sources are the work items extracted from the inputs (e.g. mints). They are
+    saved with the run so a resume does not depend on the inputs still existing.
+    """
+    manifest.update({
+        "run_id": new_run_id(),
+        "state": "open",
+        "input_bucket": input_bucket,
+        "inputs": list(input_keys),
+        "sources": list(sources or []),
+        "outputs": [],
+        "completed": [],
+        "attempts": {},
+        "failed": [],
+    })
+    save_manifest(manifest)
+    print(f"Started {manifest['stage']} run {manifest['run_id']} over {len(manifest['inputs'])} inputs.")
+    return manifest
+
+def record_output(manifest, bucket, key, source=None):
+    """Checkpoint a part file that has been fully written."""
+    manifest["outputs"].append({"bucket": bucket, "key": key, "source": source})
+    save_manifest(manifest)
+
+def record_completed(manifest, source):
+    """Checkpoint a source that finished without producing an output."""
+    manifest.setdefault("completed", []).append(source)
+    save_manifest(manifest)
+
+def record_failure(manifest, source, max_attempts):
+    """Count a failed attempt at source. Returns True once it has been given up.
+
+    After max_attempts the source is listed as failed and counts as finished,
+    so one permanently failing source cannot keep the run open forever.
+    """
+    attempts = manifest.setdefault("attempts", {})
+    attempts[source] = attempts.get(source, 0) + 1
+    gave_up = attempts[source] >= max_attempts
+    if gave_up:
+        manifest.setdefault("failed", []).append(source)
+    save_manifest(manifest)
+    return gave_up
+
+def completed_sources(manifest):
+    """Sources (e.g. mints) already finished, or given up on, in this run."""
+    sources = {output["source"] for output in manifest["outputs"] if output.get("source") is not None}
+    return sources | set(manifest.get("completed", [])) | set(manifest.get("failed", []))
+
+def heartbeat(manifest):
+    """Refresh the run's lease during long work between checkpoints."""
+    if time.time() - manifest.get("updated_at", 0) >= HEARTBEAT_SECONDS:
+        save_manifest(manifest)
+
+def commit_run(manifest, consumed_keys):
+    """Commit the run's outputs; only consumed_keys will be removed from the input prefix."""
+    manifest["inputs"] = list(consumed_keys)
+    manifest["state"] = "committed"
+    save_manifest(manifest)
+    print(f"Committed {manifest['stage']} run {manifest['run_id']}: "
+          f"{len(manifest['outputs'])} outputs, {len(manifest['inputs'])} inputs consumed.")
+
+def consume_inputs(manifest):
+    """Delete a committed run's inputs. Safe to repeat after a crash."""
+    if manifest["state"] != "committed":
+        raise ValueError(f"Run {manifest['run_id']} is {manifest['state']}, not committed")
+    for key in manifest["inputs"]:
+        try:
+            s3_client.delete_object(Bucket=manifest["input_bucket"], Key=key)
+            print(f"Deleted consumed input: {key}")
+        except Exception as e:
+            print(f"Failed to delete {key}: {e}")
+            return
+    manifest["state"] = "done"
+    save_manifest(manifest)
+
+def recover(bucket, stage):
+    """Bring a stage back to a consistent state and hand the caller a manifest.
+
+    Finishes consuming the inputs of a run that committed before a crash.
+    Returns an open run (claimed by this process) to resume, an idle manifest
+    to pass to begin_run, or None while another process holds a live run.
+    """
+    manifest = load_manifest(bucket, stage)
+    if manifest["state"] == "committed":
+        print(f"Finishing committed {stage} run {manifest['run_id']}...")
+        consume_inputs(manifest)
+        if manifest["state"] != "done":
+            raise RuntimeError(f"Could not consume inputs of committed {stage} run {manifest['run_id']}")
+    if manifest["state"] == "open":
+        idle = time.time() - manifest.get("updated_at", 0)
+        if manifest.get("owner") != OWNER_ID and idle < LEASE_SECONDS:
+            print(f"{stage} run {manifest['run_id']} is in progress elsewhere "
+                  f"(updated {int(idle)}s ago).")
+            return None
+        # Claim the run; raises ManifestConflict if another process got there first
+        save_manifest(manifest)
+        print(f"Resuming open {stage} run {manifest['run_id']} "
+              f"({len(manifest['outputs'])} outputs already checkpointed).")
+    return manifest
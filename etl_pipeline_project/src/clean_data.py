@@ -4,7 +4,6 @@ import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
 import io
-import json
 import pytz
 from datetime import datetime
 from io import StringIO
@@ -13,6 +12,9 @@ import time
 import sys
 import os
 
+import checkpoint
+import codec
+
 # AWS S3 Setup
 s3_client = boto3.client("s3")
 
@@ -20,9 +22,11 @@ s3_client = boto3.client("s3")
 S3_BUCKET_HELIUS = "pumpfun-websocket-data"
 S3_PREFIX_HELIUS = "helius/"   # Updated to match helius API uploads
 S3_PREFIX_WEBSOCKET = "Cleaned_websocket_messages/csvs/"
+S3_PREFIX_QUARANTINE = "quarantine/helius/"  # Unrecognized Helius files are moved here, not deleted
 S3_BUCKET_CLEANED = "aws-glue-assets-257394459861-us-west-2"
 S3_CSV_ARCHIVE_PREFIX = "Cleaned/csv_archive/"
 PARQUET_OUTPUT_KEY = "Helius-Databrew/parquet/combined_csvs.parquet"
+CHECKPOINT_STAGE = "clean_data"
 
 def convert_to_pst(utc_timestamp):
     try:
@@ -34,29 +38,35 @@ def convert_to_pst(utc_timestamp):
         return None
 
 def process_helius_transaction(tx):
+    # Takes a codec.HeliusTransaction. Handles raw RPC-shaped transactions as
+    # well as enhanced ones (Helius API responses and webhook batches stored by webhook.py)
     records = []
+    fee_payer = tx.feePayer
+    if not fee_payer:
+        message = tx.transaction.message if tx.transaction is not None else None
+        fee_payer = ((message.accountKeys if message is not None else None) or [""])[0]
     base_transaction = {
-        "Description": "",
-        "Type": "Helius",
-        "Source": "Helius API",
-        "Fee": tx.get("meta", {}).get("fee", 0),
-        "Fee Payer": (tx.get("transaction", {}).get("message", {}).get("accountKeys") or [""])[0],
-        "Signature": tx.get("signature", ""),
-        "Slot": tx.get("slot", 0),
-        "Timestamp (PST)": convert_to_pst(tx.get("blockTime", 0)),
+        "Description": tx.description,
+        "Type": tx.type,
+        "Source": tx.source,
+        "Fee": tx.fee or (tx.meta.fee if tx.meta is not None else 0),
+        "Fee Payer": fee_payer,
+        "Signature": tx.signature,
+        "Slot": tx.slot,
+        "Timestamp (PST)": convert_to_pst(tx.timestamp or tx.blockTime),
         "Token Name": "",
         "Token Symbol": "",
     }
-    token_transfers = tx.get("tokenTransfers", [])
+    token_transfers = tx.tokenTransfers
     if token_transfers:
         for transfer in token_transfers:
             record = {
                 **base_transaction,
-                "From Account": transfer.get("fromUserAccount", ""),
-                "To Account": transfer.get("toUserAccount", ""),
-                "Token Amount": transfer.get("tokenAmount", 0),
-                "Mint": transfer.get("mint", ""),
-                "Token Standard": transfer.get("tokenStandard", "")
+                "From Account": transfer.fromUserAccount,
+                "To Account": transfer.toUserAccount,
+                "Token Amount": transfer.tokenAmount,
+                "Mint": transfer.mint if transfer.mint is not None else "",
+                "Token Standard": transfer.tokenStandard
             }
             records.append(record)
     else:
@@ -71,45 +81,71 @@ def process_helius_transaction(tx):
         records.append(record)
     return records
 
-def process_json_files(bucket, json_files):
+def quarantine_file(bucket, key):
+    quarantine_key = f"{S3_PREFIX_QUARANTINE}{key.split('/')[-1]}"
+    try:
+        s3_client.copy_object(
+            Bucket=bucket,
+            CopySource={'Bucket': bucket, 'Key': key},
+            Key=quarantine_key
+        )
+        s3_client.delete_object(Bucket=bucket, Key=key)
+        print(f"Quarantined {key} -> {quarantine_key}")
+    except Exception as e:
+        print(f"Error quarantining {key}: {e}")
+
+def process_json_files(bucket, json_files, manifest=None):
+    """Flatten Helius JSON files. Returns the DataFrame and the keys that were read.
+
+    Inputs are not deleted here; they are consumed once the run's output commits.
+    """
     structured_data = []
+    processed_files = []
     for json_file in json_files:
+        if manifest is not None:
+            checkpoint.heartbeat(manifest)
         try:
             response = s3_client.get_object(Bucket=bucket, Key=json_file)
-            data = json.load(response["Body"])
+            body = response["Body"].read()
         except Exception as e:
             print(f"Error processing {json_file}: {e}")
             continue
+        try:
+            data = codec.decode_helius_file(body)
+        except codec.DecodeError as e:
+            print(f"Error decoding {json_file}: {e}")
+            quarantine_file(bucket, json_file)
+            continue
 
-        if isinstance(data, dict) and "metadata" in data and "transactions" in data:
-            metadata = data.get("metadata", {})
-            token_name = metadata.get("token_name", "")
-            token_symbol = metadata.get("token_symbol", "")
-            mint_address = metadata.get("mint", "")
-            transactions = data.get("transactions", [])
+        if isinstance(data, codec.HeliusBatch):
+            metadata = data.metadata
+            token_name = metadata.token_name
+            token_symbol = metadata.token_symbol
+            mint_address = metadata.mint
+            transactions = data.transactions
             entries = transactions if isinstance(transactions, list) else [transactions]
             for entry in entries:
                 base_transaction = {
-                    "Description": entry.get("description", ""),
-                    "Type": entry.get("type", ""),
-                    "Source": entry.get("source", ""),
-                    "Fee": entry.get("fee", 0),
-                    "Fee Payer": entry.get("feePayer", ""),
-                    "Signature": entry.get("signature", ""),
-                    "Slot": entry.get("slot", 0),
-                    "Timestamp (PST)": convert_to_pst(entry.get("timestamp", 0)),
+                    "Description": entry.description,
+                    "Type": entry.type,
+                    "Source": entry.source,
+                    "Fee": entry.fee,
+                    "Fee Payer": entry.feePayer,
+                    "Signature": entry.signature,
+                    "Slot": entry.slot,
+                    "Timestamp (PST)": convert_to_pst(entry.timestamp),
                     "Token Name": token_name,
                     "Token Symbol": token_symbol,
                 }
-                if entry.get("tokenTransfers"):
-                    for transfer in entry.get("tokenTransfers", []):
+                if entry.tokenTransfers:
+                    for transfer in entry.tokenTransfers:
                         record = {
                             **base_transaction,
-                            "From Account": transfer.get("fromUserAccount", ""),
-                            "To Account": transfer.get("toUserAccount", ""),
-                            "Token Amount": transfer.get("tokenAmount", 0),
-                            "Mint": transfer.get("mint", mint_address),
-                            "Token Standard": transfer.get("tokenStandard", "")
+                            "From Account": transfer.fromUserAccount,
+                            "To Account": transfer.toUserAccount,
+                            "Token Amount": transfer.tokenAmount,
+                            "Mint": transfer.mint if transfer.mint is not None else mint_address,
+                            "Token Standard": transfer.tokenStandard
                         }
                         structured_data.append(record)
                 else:
@@ -121,20 +157,17 @@ def process_json_files(bucket, json_files):
                         "Mint": mint_address,
                         "Token Standard": ""
                     })
-        elif isinstance(data, list):
+        elif isinstance(data, list) and all(isinstance(tx, codec.HeliusTransaction) for tx in data):
             # Process list of transactions from Helius API
             for tx in data:
                 records = process_helius_transaction(tx)
                 structured_data.extend(records)
         else:
             print(f"Unrecognized JSON structure in {json_file}")
-
-        try:
-            s3_client.delete_object(Bucket=bucket, Key=json_file)
-            print(f"Deleted JSON file: {json_file}")
-        except Exception as e:
-            print(f"Failed to delete {json_file}: {e}")
-    return pd.DataFrame(structured_data)
+            quarantine_file(bucket, json_file)
+            continue
+        processed_files.append(json_file)
+    return pd.DataFrame(structured_data), processed_files
 
 def rename_csv_files_to_timestamp_format():
     continuation_token = None
@@ -191,9 +224,13 @@ def list_all_csv_websocket_files(bucket, prefix):
             break
     return all_csv_files
 
-def process_websocket_csv_files(bucket, csv_files):
+def process_websocket_csv_files(bucket, csv_files, manifest=None):
+    """Flatten websocket CSVs. Returns the DataFrame and the keys that were read."""
     structured_data = []
+    processed_files = []
     for csv_file in csv_files:
+        if manifest is not None:
+            checkpoint.heartbeat(manifest)
         try:
             response = s3_client.get_object(Bucket=bucket, Key=csv_file)
             csv_content = response["Body"].read().decode("utf-8")
@@ -225,12 +262,8 @@ def process_websocket_csv_files(bucket, csv_files):
                 "Token Standard": ""
             }
             structured_data.append(record)
-        try:
-            s3_client.delete_object(Bucket=bucket, Key=csv_file)
-            print(f"Deleted websocket CSV file: {csv_file}")
-        except Exception as e:
-            print(f"Failed to delete websocket CSV file {csv_file}: {e}")
-    return pd.DataFrame(structured_data)
+        processed_files.append(csv_file)
+    return pd.DataFrame(structured_data), processed_files
 
 def list_all_json_files(bucket, prefix):
     all_json_files = []
@@ -251,20 +284,34 @@ def list_all_json_files(bucket, prefix):
     return all_json_files
 
 def main():
+    # Resume an interrupted run over the same inputs, or start a new one
+    manifest = checkpoint.recover(S3_BUCKET_CLEANED, CHECKPOINT_STAGE)
+    if manifest is None:
+        print("Another clean_data run is in progress. Exiting...")
+        return
+    if manifest["state"] == "open":
+        json_files = [key for key in manifest["inputs"] if key.startswith(S3_PREFIX_HELIUS)]
+        websocket_csv_files = [key for key in manifest["inputs"] if key.startswith(S3_PREFIX_WEBSOCKET)]
+    else:
+        json_files = list_all_json_files(S3_BUCKET_HELIUS, S3_PREFIX_HELIUS)
+        websocket_csv_files = list_all_csv_websocket_files(S3_BUCKET_HELIUS, S3_PREFIX_WEBSOCKET)
+        manifest = checkpoint.begin_run(manifest, S3_BUCKET_HELIUS, json_files + websocket_csv_files)
+    consumed_files = []
+
     # Process JSON files from Helius API data
-    json_files = list_all_json_files(S3_BUCKET_HELIUS, S3_PREFIX_HELIUS)
     if json_files:
         print(f"Found {len(json_files)} JSON files.")
-        df_cleaned = process_json_files(S3_BUCKET_HELIUS, json_files)
+        df_cleaned, processed_files = process_json_files(S3_BUCKET_HELIUS, json_files, manifest)
+        consumed_files.extend(processed_files)
     else:
         print("No JSON files found.")
         df_cleaned = pd.DataFrame()
 
     # Process websocket CSV files
-    websocket_csv_files = list_all_csv_websocket_files(S3_BUCKET_HELIUS, S3_PREFIX_WEBSOCKET)
     if websocket_csv_files:
         print(f"Found {len(websocket_csv_files)} websocket CSV files.")
-        df_websocket = process_websocket_csv_files(S3_BUCKET_HELIUS, websocket_csv_files)
+        df_websocket, processed_files = process_websocket_csv_files(S3_BUCKET_HELIUS, websocket_csv_files, manifest)
+        consumed_files.extend(processed_files)
         if not df_cleaned.empty:
             df_cleaned = pd.concat([df_cleaned, df_websocket], ignore_index=True)
         else:
@@ -280,12 +327,20 @@ def main():
         print(f"Error converting cleaned DataFrame to CSV: {e}")
         return
     csv_data = csv_buffer.getvalue()
-    csv_key = f"{S3_CSV_ARCHIVE_PREFIX}cleaned_transactions_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv"
+    # Keyed by run so a resumed run overwrites its own partial output. The run id
+    # starts with a timestamp, so the archive rename leaves this key in place.
+    csv_key = f"{S3_CSV_ARCHIVE_PREFIX}{manifest['run_id']}_cleaned_transactions.csv"
     try:
         s3_client.put_object(Bucket=S3_BUCKET_CLEANED, Key=csv_key, Body=csv_data.encode('utf-8'))
         print(f"Uploaded cleaned CSV to s3://{S3_BUCKET_CLEANED}/{csv_key}")
     except Exception as e:
         print(f"Error uploading cleaned CSV: {e}")
+        return
+    checkpoint.record_output(manifest, S3_BUCKET_CLEANED, csv_key)
+
+    # Inputs are only removed once the cleaned CSV is committed
+    checkpoint.commit_run(manifest, consumed_files)
+    checkpoint.consume_inputs(manifest)
 
     rename_csv_files_to_timestamp_format()
 
@@ -1,9 +1,10 @@
 import boto3
-import json
 import pandas as pd
 import time
 from io import StringIO
 
+import codec
+
 # Constants
 BUCKET_NAME = 'pumpfun-websocket-data'
 SOURCE_PREFIX = 'websocket_messages/'
@@ -23,13 +24,13 @@ def list_json_files():
     return json_files
 
 def transform_json_to_csv(json_content):
-    data = json.loads(json_content)
+    event = codec.decode_pumpportal_event(json_content)
     filtered_data = {
-        'mint': data.get('mint'),
-        'txType': data.get('txType'),
-        'solAmount': data.get('solAmount'),
-        'name': data.get('name'),
-        'symbol': data.get('symbol'),
+        'mint': event.mint,
+        'txType': event.txType,
+        'solAmount': event.solAmount,
+        'name': event.name,
+        'symbol': event.symbol,
     }
     return pd.DataFrame([filtered_data])
 
@@ -38,7 +39,7 @@ def process_batch(batch_files):
         key = file_obj['Key']
         try:
             response = s3.get_object(Bucket=BUCKET_NAME, Key=key)
-            content = response['Body'].read().decode('utf-8')
+            content = response['Body'].read()
             df = transform_json_to_csv(content)
             csv_buffer = StringIO()
             df.to_csv(csv_buffer, index=False)
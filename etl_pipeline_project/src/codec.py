@@ -0,0 +1,204 @@
+import json
+from typing import Any, List, Optional, Union
+
+# Optional fast JSON backends. msgspec gives typed decoding straight into
+# structs (unknown fields are skipped without being materialised), orjson is
+# a faster drop-in for generic loads/dumps. The stdlib is always the fallback.
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Exceptions a caller should treat as "this payload is not valid JSON / not the
+# expected shape". orjson.JSONDecodeError already subclasses json.JSONDecodeError.
+if msgspec is not None:
+    DecodeError = (ValueError, msgspec.DecodeError)
+else:
+    DecodeError = (ValueError,)
+
+def loads(data):
+    """Decode a JSON document (str or bytes) into plain Python objects."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj):
+    """Encode obj as compact UTF-8 JSON bytes for storage."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+# Message definitions: only the fields the pipeline actually reads.
+# Each entry is (field name, type, default), or (field name, type) for a
+# required field; defaults mirror the .get() defaults
+# the stages used when they worked on raw dicts.
+PUMPPORTAL_EVENT_FIELDS = [
+    ("mint", Optional[str], None),
+    ("txType", Optional[str], None),
+    ("solAmount", Optional[float], None),
+    ("name", Optional[str], None),
+    ("symbol", Optional[str], None),
+]
+
+TOKEN_TRANSFER_FIELDS = [
+    ("fromUserAccount", Optional[str], ""),
+    ("toUserAccount", Optional[str], ""),
+    ("tokenAmount", Optional[float], 0),
+    ("mint", Optional[str], None),
+    ("tokenStandard", Optional[str], ""),
+]
+
+HELIUS_METADATA_FIELDS = [
+    ("token_name", Optional[str], ""),
+    ("token_symbol", Optional[str], ""),
+    ("mint", Optional[str], ""),
+]
+
+# Raw RPC-shaped transactions carry the fee under meta and the fee payer as
+# the first account key instead of the enhanced fee/feePayer fields.
+TRANSACTION_META_FIELDS = [
+    ("fee", Optional[int], 0),
+]
+
+TRANSACTION_MESSAGE_FIELDS = [
+    ("accountKeys", Optional[List[Any]], None),
+]
+
+class _SlotsRecord:
+    """Stdlib fallback for msgspec structs: a plain __slots__ record."""
+    __slots__ = ()
+    _fields = ()
+
+    def __init__(self, **kwargs):
+        for name, default in self._fields:
+            setattr(self, name, kwargs.get(name, default))
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name, _ in self._fields)
+        return f"{type(self).__name__}({values})"
+
+# Per message type: ((field, default), ...) and {field: nested message type},
+# used to build records from already-parsed dicts.
+_SPECS = {}
+
+def _define(name, fields, nested=None):
+    """Build a message type from a field spec using the best available backend."""
+    defaults = tuple((field[0], field[2] if len(field) > 2 else None) for field in fields)
+    if msgspec is not None:
+        cls = msgspec.defstruct(name, fields, module=__name__)
+    else:
+        cls = type(name, (_SlotsRecord,), {
+            "__slots__": tuple(field for field, _ in defaults),
+            "_fields": defaults,
+            "__module__": __name__,
+        })
+    _SPECS[cls] = (defaults, nested or {})
+    return cls
+
+def from_dict(cls, data):
+    """Build a cls record from a parsed dict without type validation.
+
+    Values pass through as-is, like the .get() lookups the stages used before,
+    so a wrongly typed field never loses the record. Raises TypeError when the
+    shape is wrong: data, or a nested record, that is not an object.
+    """
+    if not isinstance(data, dict):
+        raise TypeError(f"{cls.__name__} expects a JSON object, got {type(data).__name__}")
+    fields, nested = _SPECS[cls]
+    values = {}
+    for name, default in fields:
+        value = data.get(name, default)
+        inner = nested.get(name)
+        if inner is not None and value is not None:
+            if isinstance(value, list):
+                value = [from_dict(inner, item) for item in value]
+            else:
+                value = from_dict(inner, value)
+        values[name] = value
+    return cls(**values)
+
+PumpPortalEvent = _define("PumpPortalEvent", PUMPPORTAL_EVENT_FIELDS)
+TokenTransfer = _define("TokenTransfer", TOKEN_TRANSFER_FIELDS)
+HeliusMetadata = _define("HeliusMetadata", HELIUS_METADATA_FIELDS)
+TransactionMeta = _define("TransactionMeta", TRANSACTION_META_FIELDS)
+TransactionMessage = _define("TransactionMessage", TRANSACTION_MESSAGE_FIELDS)
+RawTransaction = _define(
+    "RawTransaction",
+    [("message", Optional[TransactionMessage], None)],
+    nested={"message": TransactionMessage},
+)
+
+HELIUS_TRANSACTION_FIELDS = [
+    ("description", Optional[str], ""),
+    ("type", Optional[str], ""),
+    ("source", Optional[str], ""),
+    ("fee", Optional[int], 0),
+    ("feePayer", Optional[str], ""),
+    ("signature", Optional[str], ""),
+    ("slot", Optional[int], 0),
+    ("timestamp", Optional[int], 0),
+    ("tokenTransfers", Optional[List[TokenTransfer]], None),
+    ("blockTime", Optional[int], 0),
+    ("meta", Optional[TransactionMeta], None),
+    ("transaction", Optional[RawTransaction], None),
+]
+
+HeliusTransaction = _define(
+    "HeliusTransaction", HELIUS_TRANSACTION_FIELDS, nested={
+        "tokenTransfers": TokenTransfer,
+        "meta": TransactionMeta,
+        "transaction": RawTransaction,
+    }
+)
+
+# A stored Helius file as written with metadata: {"metadata": {...}, "transactions": [...]}.
+# "transactions" may also be a single object.
+HeliusBatch = _define("HeliusBatch", [
+    ("metadata", HeliusMetadata),
+    ("transactions", Union[List[HeliusTransaction], HeliusTransaction]),
+], nested={"metadata": HeliusMetadata, "transactions": HeliusTransaction})
+
+if msgspec is not None:
+    _pumpportal_decoder = msgspec.json.Decoder(PumpPortalEvent)
+    _helius_file_decoder = msgspec.json.Decoder(Union[HeliusBatch, List[HeliusTransaction]])
+
+def decode_pumpportal_event(data):
+    """Decode a single pumpportal websocket message into a PumpPortalEvent."""
+    if msgspec is not None:
+        try:
+            return _pumpportal_decoder.decode(data)
+        except msgspec.ValidationError:
+            pass
+    return from_dict(PumpPortalEvent, loads(data))
+
+def decode_helius_file(data):
+    """Decode a stored Helius JSON file.
+
+    Returns a HeliusBatch for metadata-wrapped files, a list of HeliusTransaction
+    for bare Helius API responses and webhook batches, or whatever else the
+    document contains so the caller can report unrecognized structures.
+    Documents that fail typed validation are rebuilt leniently from dicts; if
+    they are not made of objects at all the raw document is returned.
+    """
+    if msgspec is not None:
+        try:
+            return _helius_file_decoder.decode(data)
+        except msgspec.ValidationError:
+            pass
+    document = loads(data)
+    try:
+        if isinstance(document, dict) and "metadata" in document and "transactions" in document:
+            return from_dict(HeliusBatch, {
+                "metadata": document.get("metadata") or {},
+                "transactions": document.get("transactions") or [],
+            })
+        if isinstance(document, list):
+            return [from_dict(HeliusTransaction, tx) for tx in document]
+    except TypeError:
+        pass
+    return document
@@ -1,17 +1,21 @@
 import time
 import subprocess
 import boto3
-import json
 import requests
 import csv
 import io
-from datetime import datetime
 import traceback
 
+import checkpoint
+import codec
+import webhook
+
 # AWS S3 Setup
 S3_BUCKET = "pumpfun-websocket-data"
 S3_SOURCE_PREFIX = "Cleaned_websocket_messages/csvs/"  # Source for mint extraction
 S3_DEST_PREFIX = "helius/"  # Destination for Helius API data
+CHECKPOINT_STAGE = "helius"
+MAX_FETCH_ATTEMPTS = 5  # Failed fetches per mint before the run gives it up
 s3_client = boto3.client("s3")
 
 # Helius API Setup
@@ -19,21 +23,31 @@ import os
 HELIUS_API_KEY = os.getenv("HELIUS_API_KEY")
 HELIUS_API_URL = "https://api.helius.xyz/v0/addresses/{address}/transactions/?api-key=" + HELIUS_API_KEY
 
-def get_mint_addresses_from_s3():
+def list_mint_csv_files():
     print(f"Checking for mint addresses in s3://{S3_BUCKET}/{S3_SOURCE_PREFIX}...")
     response = s3_client.list_objects_v2(Bucket=S3_BUCKET, Prefix=S3_SOURCE_PREFIX)
     if "Contents" not in response:
         print("No CSV files found in S3 bucket!")
         return []
 
-    mint_addresses = set()
     csv_files = [obj for obj in response["Contents"] if obj["Key"].endswith(".csv") and "cleaned_transactions" not in obj["Key"]]
     sorted_files = sorted(csv_files, key=lambda x: x["LastModified"], reverse=True)
-    latest_files = sorted_files[:1000]
-    for obj in latest_files:
-        file_key = obj["Key"]
+    return [obj["Key"] for obj in sorted_files[:1000]]
+
+def get_mint_addresses_from_s3(csv_keys):
+    """Read mints from the given CSVs. Returns the mints and the keys that were read.
+
+    The CSVs are not deleted here; they are consumed once the run commits.
+    """
+    mint_addresses = set()
+    read_keys = []
+    for file_key in csv_keys:
         print(f"Reading {file_key}...")
-        obj_data = s3_client.get_object(Bucket=S3_BUCKET, Key=file_key)
+        try:
+            obj_data = s3_client.get_object(Bucket=S3_BUCKET, Key=file_key)
+        except Exception as e:
+            print(f"Error reading {file_key}: {e}")
+            continue
         csv_content = obj_data["Body"].read().decode("utf-8")
         f = io.StringIO(csv_content)
         reader = csv.DictReader(f)
@@ -43,10 +57,9 @@ def get_mint_addresses_from_s3():
                     mint_addresses.add(row["mint"])
         else:
             print(f"Skipping {file_key} as it does not contain a 'mint' column.")
-        s3_client.delete_object(Bucket=S3_BUCKET, Key=file_key)
-        print(f"Deleted {file_key}")
+        read_keys.append(file_key)
     print(f"Found {len(mint_addresses)} unique mint addresses.")
-    return list(mint_addresses)
+    return sorted(mint_addresses), read_keys
 
 def check_existing_mint(mint):
     response = s3_client.list_objects_v2(Bucket=S3_BUCKET, Prefix=f"{S3_DEST_PREFIX}{mint}.json")
@@ -67,40 +80,95 @@ def fetch_helius_data(mint_address):
         print(f"Request failed for {mint_address}: {e}")
         return None
 
-def upload_to_s3(data, mint_address):
-    timestamp = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"{S3_DEST_PREFIX}helius_transactions_{mint_address}_{timestamp}.json"
+def upload_to_s3(data, mint_address, run_id):
+    """Upload a mint's transactions and return the S3 key, or None if there was nothing to upload."""
+    # Keyed by run so a resumed run overwrites instead of duplicating
+    filename = f"{S3_DEST_PREFIX}helius_transactions_{mint_address}_{run_id}.json"
     if data:
         s3_client.put_object(
             Bucket=S3_BUCKET, 
             Key=filename, 
-            Body=json.dumps(data), 
+            Body=codec.dumps(data), 
             ContentType="application/json"
         )
         print(f"Uploaded to S3: s3://{S3_BUCKET}/{filename}")
-    else:
-        print(f"No data for {mint_address}, skipping upload.")
+        return filename
+    print(f"No data for {mint_address}, skipping upload.")
+    return None
 
 def main():
-    mint_addresses = get_mint_addresses_from_s3()
-    if not mint_addresses:
-        print("No mint addresses found. Exiting...")
+    # Resume an interrupted run over the same mints, or start a new one
+    manifest = checkpoint.recover(S3_BUCKET, CHECKPOINT_STAGE)
+    if manifest is None:
+        print("Another helius run is in progress. Exiting...")
         return
+    if manifest["state"] != "open":
+        csv_keys = list_mint_csv_files()
+        if not csv_keys:
+            print("No mint addresses found. Exiting...")
+            return
+        # The mints are saved with the run, so a resume does not need the CSVs
+        # (clean_data.py consumes the same prefix)
+        mints, read_keys = get_mint_addresses_from_s3(csv_keys)
+        manifest = checkpoint.begin_run(manifest, S3_BUCKET, read_keys, sources=mints)
 
+    mint_addresses = manifest["sources"]
+    completed = checkpoint.completed_sources(manifest)
+
+    # Mints already on the webhook are pushed by Helius; new ones are subscribed
+    # and fetched once here to backfill what happened before the subscription.
+    # The run remembers which mints it subscribed, so a resume still backfills
+    # them instead of treating them as webhook-covered.
+    webhook_mints = webhook.get_subscribed_mints()
+    unsubscribed = [mint for mint in mint_addresses if mint not in webhook_mints]
+    if unsubscribed and webhook.webhook_enabled():
+        manifest["backfill"] = sorted(set(manifest.get("backfill", [])) | set(unsubscribed))
+        checkpoint.save_manifest(manifest)
+        webhook.subscribe_mints(unsubscribed)
+    backfill = set(manifest.get("backfill", []))
+
+    failed_mints = []
     for mint in mint_addresses:
+        checkpoint.heartbeat(manifest)
+        if mint in completed:
+            print(f"Skipping {mint}, already fetched in run {manifest['run_id']}.")
+            continue
+        if mint in webhook_mints and mint not in backfill:
+            print(f"Skipping {mint}, delivered by webhook.")
+            continue
         if check_existing_mint(mint):
             print(f"Skipping {mint}, already processed.")
             continue
         transactions = fetch_helius_data(mint)
-        upload_to_s3(transactions, mint)
+        if transactions is None:
+            if checkpoint.record_failure(manifest, mint, MAX_FETCH_ATTEMPTS):
+                print(f"Giving up on {mint} after {MAX_FETCH_ATTEMPTS} failed fetches.")
+            else:
+                failed_mints.append(mint)
+            time.sleep(1)
+            continue
+        output_key = upload_to_s3(transactions, mint, manifest["run_id"])
+        if output_key:
+            checkpoint.record_output(manifest, S3_BUCKET, output_key, source=mint)
+        else:
+            checkpoint.record_completed(manifest, mint)
         time.sleep(1)
 
+    # CSVs are only removed once every mint's output is committed. A failed fetch
+    # leaves the run open; the next pass resumes it and retries only those mints
+    # until they succeed or reach MAX_FETCH_ATTEMPTS.
+    if failed_mints:
+        print(f"{len(failed_mints)} mints failed to fetch, leaving run {manifest['run_id']} open.")
+        return
+    checkpoint.commit_run(manifest, manifest["inputs"])
+    checkpoint.consume_inputs(manifest)
+
 if __name__ == "__main__":
     while True:
         try:
             main()
             print("Data fetch complete! Running clean_data.py...")
-            subprocess.run(["python3", "clean_data.py"])
+            subprocess.run(["python3", "clean_data.py"], env=checkpoint.child_env())
         except Exception as e:
             print("Exception occurred:")
             traceback.print_exc()
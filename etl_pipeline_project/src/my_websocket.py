@@ -7,6 +7,10 @@ import boto3
 import requests
 from datetime import datetime
 
+import checkpoint
+import codec
+import webhook
+
 # AWS S3 Setup
 S3_SOURCE_BUCKET = "pumpfun-websocket-data"
 S3_SOURCE_PREFIX = "websocket_messages/"
@@ -37,7 +41,7 @@ def save_to_s3(data):
         s3.put_object(
             Bucket=S3_SOURCE_BUCKET,
             Key=file_key,
-            Body=json.dumps(data, indent=2),
+            Body=codec.dumps(data),
             ContentType="application/json"
         )
         print(f"Saved message to S3: {file_key}")
@@ -47,10 +51,10 @@ def save_to_s3(data):
 def on_message(ws, message):
     """Handle incoming WebSocket message"""
     try:
-        data = json.loads(message)
+        data = codec.loads(message)
         print("Received message:", data)
         save_to_s3(data)
-    except json.JSONDecodeError:
+    except codec.DecodeError:
         print("Error decoding message")
 
 def on_open(ws):
@@ -72,7 +76,7 @@ def get_processed_transactions():
     """Retrieve processed transaction IDs from S3 to avoid re-downloading old data."""
     try:
         obj = s3.get_object(Bucket=S3_DEST_BUCKET, Key=S3_PROCESSED_TRANSACTIONS)
-        return json.load(obj["Body"])
+        return codec.loads(obj["Body"].read())
     except s3.exceptions.NoSuchKey:
         print("ℹ️ No processed transactions found. Starting fresh...")
         return {}
@@ -82,7 +86,7 @@ def save_processed_transactions(processed_txns):
     s3.put_object(
         Bucket=S3_DEST_BUCKET,
         Key=S3_PROCESSED_TRANSACTIONS,
-        Body=json.dumps(processed_txns, indent=2),
+        Body=codec.dumps(processed_txns),
         ContentType="application/json"
     )
 
@@ -118,7 +122,7 @@ def upload_to_s3(data, mint):
     s3.put_object(
         Bucket=S3_DEST_BUCKET,
         Key=file_key,
-        Body=json.dumps(data, indent=2),
+        Body=codec.dumps(data),
         ContentType="application/json"
     )
     
@@ -128,8 +132,12 @@ def run_helius2():
     """Fetch and upload new Solana transactions for mint addresses."""
     processed_txns = get_processed_transactions()
     mint_addresses = ["address1", "address2"]  # Replace with actual address fetching logic
+    webhook_mints = webhook.get_subscribed_mints()
 
     for mint in mint_addresses:
+        if mint in webhook_mints:
+            print(f"⏭️ Skipping {mint}, delivered by webhook.")
+            continue
         print(f"📡 Fetching new transactions for {mint}...")
         new_transactions = fetch_helius_data(mint, processed_txns)
         upload_to_s3(new_transactions, mint)
@@ -137,7 +145,7 @@ def run_helius2():
     
     save_processed_transactions(processed_txns)
     print("✅ Data fetch complete! Running clean_data.py...")
-    subprocess.run(["python3", "clean_data.py"])  # Run clean_data.py after finishing data processing
+    subprocess.run(["python3", "clean_data.py"], env=checkpoint.child_env())  # Run clean_data.py after finishing data processing
 
 def run_helius2_every_three_hours():
     while True:
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import hmac
+import os
+
+import boto3
+import requests
+
+import codec
+
+# aiohttp is only needed to run the receiver; the subscription helpers below
+# are also used by the polling stages, which must keep working without it.
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+# AWS S3 Setup
+S3_BUCKET = "pumpfun-websocket-data"
+S3_DEST_PREFIX = "helius/"  # Same prefix helius.py writes to, so clean_data.py picks batches up
+s3_client = boto3.client("s3")
+
+# Helius webhook Setup
+HELIUS_API_KEY = os.getenv("HELIUS_API_KEY")
+HELIUS_WEBHOOK_ID = os.getenv("HELIUS_WEBHOOK_ID")
+HELIUS_WEBHOOK_AUTH = os.getenv("HELIUS_WEBHOOK_AUTH")  # Must match the webhook's authHeader
+HELIUS_WEBHOOK_URL = "https://api.helius.xyz/v0/webhooks/{webhook_id}?api-key={api_key}"
+MAX_WEBHOOK_ADDRESSES = 100000  # Helius limit per webhook
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH = "/helius"
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+def webhook_enabled():
+    return bool(HELIUS_API_KEY and HELIUS_WEBHOOK_ID)
+
+def get_webhook():
+    """Fetch the webhook configuration from Helius, or None on failure."""
+    url = HELIUS_WEBHOOK_URL.format(webhook_id=HELIUS_WEBHOOK_ID, api_key=HELIUS_API_KEY)
+    try:
+        response = requests.get(url, timeout=10)
+        if response.status_code == 200:
+            return response.json()
+        print(f"Error fetching webhook {HELIUS_WEBHOOK_ID}: {response.status_code}")
+    except requests.exceptions.RequestException as e:
+        print(f"Request failed for webhook {HELIUS_WEBHOOK_ID}: {e}")
+    return None
+
+def get_subscribed_mints():
+    """Mints already delivered by the webhook; these do not need polling."""
+    if not webhook_enabled():
+        return set()
+    config = get_webhook()
+    if not config:
+        return set()
+    return set(config.get("accountAddresses") or [])
+
+def subscribe_mints(mints):
+    """Add newly discovered mints to the webhook. Returns the mints that were added."""
+    if not webhook_enabled() or not mints:
+        return set()
+    config = get_webhook()
+    if not config:
+        return set()
+    addresses = list(config.get("accountAddresses") or [])
+    known = set(addresses)
+    new_mints = [mint for mint in mints if mint not in known]
+    room = MAX_WEBHOOK_ADDRESSES - len(addresses)
+    if len(new_mints) > room:
+        print(f"Webhook is full, subscribing {max(room, 0)} of {len(new_mints)} new mints.")
+        new_mints = new_mints[:max(room, 0)]
+    if not new_mints:
+        return set()
+
+    payload = {
+        "webhookURL": config.get("webhookURL"),
+        "transactionTypes": config.get("transactionTypes", ["Any"]),
+        "accountAddresses": addresses + new_mints,
+        "webhookType": config.get("webhookType", "enhanced"),
+    }
+    if config.get("authHeader"):
+        payload["authHeader"] = config["authHeader"]
+    url = HELIUS_WEBHOOK_URL.format(webhook_id=HELIUS_WEBHOOK_ID, api_key=HELIUS_API_KEY)
+    try:
+        response = requests.put(url, json=payload, timeout=10)
+        if response.status_code == 200:
+            print(f"Subscribed {len(new_mints)} new mints to webhook {HELIUS_WEBHOOK_ID}.")
+            return set(new_mints)
+        print(f"Error updating webhook {HELIUS_WEBHOOK_ID}: {response.status_code}")
+    except requests.exceptions.RequestException as e:
+        print(f"Request failed for webhook {HELIUS_WEBHOOK_ID}: {e}")
+    return set()
+
+def save_webhook_batch(body, transactions):
+    """Store a webhook batch as a Helius JSON list for clean_data.py to flatten.
+
+    The key is derived from the request body so a redelivered batch overwrites
+    the earlier copy instead of being counted twice.
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    file_key = f"{S3_DEST_PREFIX}helius_webhook_{digest}.json"
+    s3_client.put_object(
+        Bucket=S3_BUCKET,
+        Key=file_key,
+        Body=codec.dumps(transactions),
+        ContentType="application/json"
+    )
+    print(f"Stored {len(transactions)} webhook transactions to S3: {file_key}")
+    return file_key
+
+def is_authorized(request):
+    # compare_digest only accepts ASCII str, so compare bytes to reject any header cleanly
+    auth = request.headers.get("Authorization", "").encode("utf-8", "surrogateescape")
+    return bool(HELIUS_WEBHOOK_AUTH) and hmac.compare_digest(auth, HELIUS_WEBHOOK_AUTH.encode("utf-8"))
+
+async def handle_helius_webhook(request):
+    """Accept a batch of Helius transactions POSTed by the webhook."""
+    if not is_authorized(request):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    body = await request.read()
+    try:
+        transactions = codec.loads(body)
+    except codec.DecodeError:
+        return web.json_response({"error": "invalid JSON"}, status=400)
+    if not isinstance(transactions, list) or not all(isinstance(tx, dict) for tx in transactions):
+        return web.json_response({"error": "expected a list of transactions"}, status=400)
+    if transactions:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, save_webhook_batch, body, transactions)
+        except Exception as e:
+            # Non-2xx makes Helius redeliver the batch
+            print(f"Error saving webhook batch: {e}")
+            return web.json_response({"error": "storage failed"}, status=503)
+    return web.json_response({"received": len(transactions)})
+
+def create_app():
+    if web is None:
+        raise RuntimeError("aiohttp is required to run the webhook receiver")
+    app = web.Application(client_max_size=MAX_BODY_SIZE)
+    app.router.add_post(WEBHOOK_PATH, handle_helius_webhook)
+    return app
+
+if __name__ == "__main__":
+    if not HELIUS_WEBHOOK_AUTH:
+        raise SystemExit("HELIUS_WEBHOOK_AUTH must be set to validate webhook requests")
+    app = create_app()
+    print(f"📡 Listening for Helius webhooks on :{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    web.run_app(app, port=WEBHOOK_PORT)
@@ -0,0 +1,74 @@
+import hashlib
+import io
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+# The pipeline stages are plain scripts in src/ that import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+os.environ.setdefault("HELIUS_API_KEY", "test-key")
+
+class FakeS3:
+    """In-memory stand-in for the S3 calls the stages make.
+
+    put_object honours IfMatch/IfNoneMatch like S3 conditional writes, raising
+    the same PreconditionFailed ClientError.
+    """
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.objects = {}
+        self.fail_puts = False
+
+    def _etag(self, body):
+        return f'"{hashlib.md5(body).hexdigest()}"'
+
+    def _precondition_failed(self):
+        from botocore.exceptions import ClientError
+        return ClientError({"Error": {"Code": "PreconditionFailed", "Message": "At least one of the pre-conditions you specified did not hold"}}, "PutObject")
+
+    def put_object(self, Bucket, Key, Body, IfMatch=None, IfNoneMatch=None, **kwargs):
+        if self.fail_puts:
+            raise RuntimeError("S3 unavailable")
+        if isinstance(Body, str):
+            Body = Body.encode("utf-8")
+        current = self.objects.get((Bucket, Key))
+        if IfNoneMatch == "*" and current is not None:
+            raise self._precondition_failed()
+        if IfMatch is not None and (current is None or self._etag(current) != IfMatch):
+            raise self._precondition_failed()
+        self.objects[(Bucket, Key)] = Body
+        return {"ETag": self._etag(Body)}
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        body = self.objects[(Bucket, Key)]
+        return {"Body": io.BytesIO(body), "ETag": self._etag(body)}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def copy_object(self, Bucket, CopySource, Key):
+        self.objects[(Bucket, Key)] = self.objects[(CopySource["Bucket"], CopySource["Key"])]
+
+    def list_objects_v2(self, Bucket, Prefix="", **kwargs):
+        contents = [
+            {"Key": key, "LastModified": datetime.now(timezone.utc)}
+            for (bucket, key) in sorted(self.objects)
+            if bucket == Bucket and key.startswith(Prefix)
+        ]
+        return {"Contents": contents} if contents else {}
+
+    def keys(self, bucket):
+        return sorted(key for (b, key) in self.objects if b == bucket)
+
+@pytest.fixture
+def fake_s3():
+    return FakeS3()
@@ -0,0 +1,121 @@
+import pytest
+
+pytest.importorskip("boto3")
+
+import checkpoint
+
+BUCKET = "checkpoint-bucket"
+INPUT_BUCKET = "input-bucket"
+STAGE = "stage"
+
+@pytest.fixture
+def s3(fake_s3, monkeypatch):
+    monkeypatch.setattr(checkpoint, "s3_client", fake_s3)
+    monkeypatch.setattr(checkpoint, "OWNER_ID", "me")
+    for key in ("in/1.csv", "in/2.csv"):
+        fake_s3.put_object(Bucket=INPUT_BUCKET, Key=key, Body=b"mint\nM\n")
+    return fake_s3
+
+def start_run(sources=None):
+    manifest = checkpoint.recover(BUCKET, STAGE)
+    return checkpoint.begin_run(manifest, INPUT_BUCKET, ["in/1.csv", "in/2.csv"], sources=sources)
+
+def test_full_run_consumes_inputs_after_commit(s3):
+    manifest = start_run()
+    checkpoint.record_output(manifest, BUCKET, "out/part-0.csv")
+    assert s3.keys(INPUT_BUCKET) == ["in/1.csv", "in/2.csv"]
+
+    checkpoint.commit_run(manifest, ["in/1.csv"])
+    checkpoint.consume_inputs(manifest)
+
+    assert s3.keys(INPUT_BUCKET) == ["in/2.csv"]
+    stored = checkpoint.load_manifest(BUCKET, STAGE)
+    assert stored["state"] == "done"
+    assert stored["outputs"] == [{"bucket": BUCKET, "key": "out/part-0.csv", "source": None}]
+
+def test_run_ids_are_unique():
+    assert checkpoint.new_run_id() != checkpoint.new_run_id()
+
+def test_consume_requires_commit(s3):
+    manifest = start_run()
+    with pytest.raises(ValueError):
+        checkpoint.consume_inputs(manifest)
+    assert s3.keys(INPUT_BUCKET) == ["in/1.csv", "in/2.csv"]
+
+def test_recover_finishes_committed_run(s3):
+    manifest = start_run()
+    checkpoint.commit_run(manifest, ["in/1.csv", "in/2.csv"])
+    # Crash before consume_inputs
+
+    resumed = checkpoint.recover(BUCKET, STAGE)
+    assert resumed["state"] == "done"
+    assert s3.keys(INPUT_BUCKET) == []
+
+def test_concurrent_begin_conflicts(s3):
+    first = checkpoint.recover(BUCKET, STAGE)
+    second = checkpoint.recover(BUCKET, STAGE)
+    checkpoint.begin_run(first, INPUT_BUCKET, ["in/1.csv"])
+    with pytest.raises(checkpoint.ManifestConflict):
+        checkpoint.begin_run(second, INPUT_BUCKET, ["in/1.csv"])
+
+def test_stale_manifest_write_conflicts(s3):
+    start_run()
+    mine = checkpoint.load_manifest(BUCKET, STAGE)
+    theirs = checkpoint.load_manifest(BUCKET, STAGE)
+    checkpoint.record_output(theirs, BUCKET, "out/theirs.csv")
+    with pytest.raises(checkpoint.ManifestConflict):
+        checkpoint.commit_run(mine, ["in/1.csv", "in/2.csv"])
+    assert s3.keys(INPUT_BUCKET) == ["in/1.csv", "in/2.csv"]
+
+def test_owner_resumes_own_open_run(s3):
+    manifest = start_run(sources=["A", "B"])
+    checkpoint.record_output(manifest, BUCKET, "out/A.json", source="A")
+
+    resumed = checkpoint.recover(BUCKET, STAGE)
+    assert resumed["state"] == "open"
+    assert resumed["run_id"] == manifest["run_id"]
+    assert resumed["sources"] == ["A", "B"]
+    assert checkpoint.completed_sources(resumed) == {"A"}
+
+def test_live_run_of_another_owner_is_left_alone(s3, monkeypatch):
+    monkeypatch.setattr(checkpoint, "OWNER_ID", "other")
+    start_run()
+    monkeypatch.setattr(checkpoint, "OWNER_ID", "me")
+    assert checkpoint.recover(BUCKET, STAGE) is None
+
+def test_expired_lease_is_taken_over(s3, monkeypatch):
+    monkeypatch.setattr(checkpoint, "OWNER_ID", "other")
+    manifest = start_run()
+    monkeypatch.setattr(checkpoint, "OWNER_ID", "me")
+    monkeypatch.setattr(checkpoint, "LEASE_SECONDS", 0)
+
+    resumed = checkpoint.recover(BUCKET, STAGE)
+    assert resumed["run_id"] == manifest["run_id"]
+    assert checkpoint.load_manifest(BUCKET, STAGE)["owner"] == "me"
+    # The previous owner can no longer write
+    with pytest.raises(checkpoint.ManifestConflict):
+        checkpoint.record_output(manifest, BUCKET, "out/late.csv")
+
+def test_heartbeat_refreshes_lease_only_when_due(s3, monkeypatch):
+    manifest = start_run()
+    etag = manifest["etag"]
+    checkpoint.heartbeat(manifest)
+    assert manifest["etag"] == etag
+
+    monkeypatch.setattr(checkpoint, "HEARTBEAT_SECONDS", 0)
+    manifest["outputs"].append({"bucket": BUCKET, "key": "out/x", "source": None})
+    checkpoint.heartbeat(manifest)
+    assert manifest["etag"] != etag
+
+def test_record_failure_gives_up_after_max_attempts(s3):
+    manifest = start_run(sources=["A"])
+    assert not checkpoint.record_failure(manifest, "A", 3)
+    assert not checkpoint.record_failure(manifest, "A", 3)
+    assert "A" not in checkpoint.completed_sources(manifest)
+    assert checkpoint.record_failure(manifest, "A", 3)
+    stored = checkpoint.load_manifest(BUCKET, STAGE)
+    assert stored["failed"] == ["A"]
+    assert checkpoint.completed_sources(stored) == {"A"}
+
+def test_child_env_passes_owner(s3):
+    assert checkpoint.child_env()["CHECKPOINT_OWNER"] == "me"
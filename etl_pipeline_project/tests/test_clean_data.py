@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("pytz")
+
+import clean_data
+
+BUCKET = clean_data.S3_BUCKET_HELIUS
+
+@pytest.fixture
+def s3(fake_s3, monkeypatch):
+    monkeypatch.setattr(clean_data, "s3_client", fake_s3)
+    return fake_s3
+
+def test_flattens_bare_list_and_metadata_files(s3):
+    s3.put_object(Bucket=BUCKET, Key="helius/list.json", Body=(
+        b'[{"type":"SWAP","source":"RAYDIUM","fee":5000,"feePayer":"P","signature":"S1",'
+        b'"tokenTransfers":[{"mint":"M1","tokenAmount":2}]}]'
+    ))
+    s3.put_object(Bucket=BUCKET, Key="helius/wrapped.json", Body=(
+        b'{"metadata":{"token_name":"Tok","mint":"M2"},'
+        b'"transactions":[{"type":"TRANSFER","signature":"S2","slot":1.0}]}'
+    ))
+    df, processed = clean_data.process_json_files(BUCKET, ["helius/list.json", "helius/wrapped.json"])
+    assert processed == ["helius/list.json", "helius/wrapped.json"]
+    assert list(df["Signature"]) == ["S1", "S2"]
+    assert list(df["Type"]) == ["SWAP", "TRANSFER"]
+    assert list(df["Mint"]) == ["M1", "M2"]
+    assert df["Token Name"].iloc[1] == "Tok"
+
+@pytest.mark.parametrize("body", [b"{not json", b"[1,2]", b'{"metadata":{},"transactions":[1]}', b'{"a":1}'])
+def test_bad_files_are_quarantined_not_consumed(s3, body):
+    s3.put_object(Bucket=BUCKET, Key="helius/bad.json", Body=body)
+    df, processed = clean_data.process_json_files(BUCKET, ["helius/bad.json"])
+    assert processed == []
+    assert df.empty
+    assert s3.keys(BUCKET) == [f"{clean_data.S3_PREFIX_QUARANTINE}bad.json"]
@@ -0,0 +1,89 @@
+import importlib
+import sys
+
+import pytest
+
+import codec
+
+@pytest.fixture(params=["msgspec", "stdlib"])
+def backend(request, monkeypatch):
+    """Reload codec with msgspec available (if installed) or hidden."""
+    if request.param == "msgspec":
+        pytest.importorskip("msgspec")
+    else:
+        monkeypatch.setitem(sys.modules, "msgspec", None)
+    module = importlib.reload(codec)
+    yield module
+    monkeypatch.undo()
+    importlib.reload(codec)
+
+ENHANCED_LIST = (
+    b'[{"description":"swap","type":"SWAP","source":"RAYDIUM","fee":5000,'
+    b'"feePayer":"Payer1","signature":"Sig1","slot":42,"timestamp":1700000000,'
+    b'"unused":{"nested":[1,2,3]},'
+    b'"tokenTransfers":[{"fromUserAccount":"A","toUserAccount":"B",'
+    b'"tokenAmount":1.5,"mint":"Mint1","tokenStandard":"Fungible"}]}]'
+)
+
+def test_bare_list_decodes_to_transactions(backend):
+    [tx] = backend.decode_helius_file(ENHANCED_LIST)
+    assert isinstance(tx, backend.HeliusTransaction)
+    assert (tx.type, tx.source, tx.fee, tx.feePayer, tx.slot) == ("SWAP", "RAYDIUM", 5000, "Payer1", 42)
+    [transfer] = tx.tokenTransfers
+    assert isinstance(transfer, backend.TokenTransfer)
+    assert (transfer.mint, transfer.tokenAmount) == ("Mint1", 1.5)
+    assert not hasattr(tx, "unused")
+
+def test_raw_rpc_fields_decode(backend):
+    [tx] = backend.decode_helius_file(
+        b'[{"signature":"r","meta":{"fee":7},"blockTime":1700000000,'
+        b'"transaction":{"message":{"accountKeys":["K1","K2"]}}}]'
+    )
+    assert tx.meta.fee == 7
+    assert tx.blockTime == 1700000000
+    assert tx.transaction.message.accountKeys == ["K1", "K2"]
+
+def test_metadata_wrapped_file_decodes_to_batch(backend):
+    batch = backend.decode_helius_file(
+        b'{"metadata":{"token_name":"Tok","token_symbol":"TK","mint":"Mint1"},'
+        b'"transactions":[{"signature":"Sig1","fee":10}]}'
+    )
+    assert isinstance(batch, backend.HeliusBatch)
+    assert (batch.metadata.token_name, batch.metadata.mint) == ("Tok", "Mint1")
+    assert [tx.signature for tx in batch.transactions] == ["Sig1"]
+
+def test_metadata_wrapped_single_transaction(backend):
+    batch = backend.decode_helius_file(b'{"metadata":{},"transactions":{"signature":"Sig1"}}')
+    assert isinstance(batch, backend.HeliusBatch)
+    assert batch.transactions.signature == "Sig1"
+
+def test_wrongly_typed_fields_fall_back_leniently(backend):
+    batch = backend.decode_helius_file(
+        b'{"metadata":{"mint":"X"},"transactions":[{"slot":1.0,'
+        b'"tokenTransfers":[{"tokenAmount":"1.5"}]}]}'
+    )
+    assert isinstance(batch, backend.HeliusBatch)
+    [tx] = batch.transactions
+    assert tx.slot == 1.0
+    assert tx.tokenTransfers[0].tokenAmount == "1.5"
+
+@pytest.mark.parametrize("document", [
+    b'{"a":1}',
+    b"[1,2]",
+    b'{"metadata":{},"transactions":[1]}',
+    b'[{"tokenTransfers":["not an object"]}]',
+])
+def test_unrecognized_shapes_return_raw_document(backend, document):
+    assert backend.decode_helius_file(document) == backend.loads(document)
+
+def test_invalid_json_raises_decode_error(backend):
+    with pytest.raises(backend.DecodeError):
+        backend.decode_helius_file(b"{not json")
+
+def test_pumpportal_event_keeps_wrongly_typed_values(backend):
+    event = backend.decode_pumpportal_event(b'{"mint":"M","txType":"create","solAmount":"2.5","extra":1}')
+    assert isinstance(event, backend.PumpPortalEvent)
+    assert (event.mint, event.txType, event.solAmount, event.name) == ("M", "create", "2.5", None)
+
+def test_dumps_is_compact(backend):
+    assert backend.dumps({"a": [1, 2], "b": "é"}) == '{"a":[1,2],"b":"é"}'.encode("utf-8")
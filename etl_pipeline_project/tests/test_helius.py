@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("requests")
+
+import checkpoint
+import helius
+import webhook
+
+BUCKET = helius.S3_BUCKET
+CSV_KEY = f"{helius.S3_SOURCE_PREFIX}1.csv"
+
+@pytest.fixture
+def s3(fake_s3, monkeypatch):
+    monkeypatch.setattr(helius, "s3_client", fake_s3)
+    monkeypatch.setattr(checkpoint, "s3_client", fake_s3)
+    monkeypatch.setattr(checkpoint, "OWNER_ID", "me")
+    monkeypatch.setattr(helius.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(webhook, "get_subscribed_mints", lambda: set())
+    monkeypatch.setattr(webhook, "subscribe_mints", lambda mints: set())
+    fake_s3.put_object(Bucket=BUCKET, Key=CSV_KEY, Body=b"mint\nA\nB\n")
+    return fake_s3
+
+def fetcher(failing, calls):
+    def fetch(mint):
+        calls.append(mint)
+        return None if mint in failing else [{"signature": f"sig-{mint}"}]
+    return fetch
+
+def output_keys(s3):
+    return [key for key in s3.keys(BUCKET) if key.startswith(helius.S3_DEST_PREFIX)]
+
+def test_failed_fetch_is_retried_from_saved_mints(s3, monkeypatch):
+    calls = []
+    monkeypatch.setattr(helius, "fetch_helius_data", fetcher({"B"}, calls))
+    helius.main()
+    manifest = checkpoint.load_manifest(BUCKET, helius.CHECKPOINT_STAGE)
+    assert manifest["state"] == "open"
+    assert s3.keys(BUCKET).count(CSV_KEY) == 1
+
+    # clean_data.py consumes the same CSV prefix between helius passes
+    s3.delete_object(Bucket=BUCKET, Key=CSV_KEY)
+
+    calls.clear()
+    monkeypatch.setattr(helius, "fetch_helius_data", fetcher(set(), calls))
+    helius.main()
+    assert calls == ["B"]
+    manifest = checkpoint.load_manifest(BUCKET, helius.CHECKPOINT_STAGE)
+    assert manifest["state"] == "done"
+    assert checkpoint.completed_sources(manifest) == {"A", "B"}
+    assert len(output_keys(s3)) == 2
+
+def test_permanently_failing_mint_is_given_up(s3, monkeypatch):
+    calls = []
+    monkeypatch.setattr(helius, "fetch_helius_data", fetcher({"B"}, calls))
+    for _ in range(helius.MAX_FETCH_ATTEMPTS):
+        helius.main()
+    manifest = checkpoint.load_manifest(BUCKET, helius.CHECKPOINT_STAGE)
+    assert manifest["state"] == "done"
+    assert manifest["failed"] == ["B"]
+    assert calls.count("A") == 1
+    assert calls.count("B") == helius.MAX_FETCH_ATTEMPTS
+    assert CSV_KEY not in s3.keys(BUCKET)
+
+def test_new_subscriptions_are_still_backfilled_on_resume(s3, monkeypatch):
+    subscribed = {"C"}
+    s3.put_object(Bucket=BUCKET, Key=CSV_KEY, Body=b"mint\nA\nB\nC\n")
+    monkeypatch.setattr(webhook, "webhook_enabled", lambda: True)
+    monkeypatch.setattr(webhook, "get_subscribed_mints", lambda: set(subscribed))
+    monkeypatch.setattr(webhook, "subscribe_mints", lambda mints: subscribed.update(mints))
+
+    calls = []
+    monkeypatch.setattr(helius, "fetch_helius_data", fetcher({"B"}, calls))
+    helius.main()
+    assert subscribed == {"A", "B", "C"}
+    assert calls == ["A", "B"]
+
+    # B is on the webhook now, but its pre-subscription history was never fetched
+    calls.clear()
+    monkeypatch.setattr(helius, "fetch_helius_data", fetcher(set(), calls))
+    helius.main()
+    assert calls == ["B"]
+    assert checkpoint.load_manifest(BUCKET, helius.CHECKPOINT_STAGE)["state"] == "done"
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("boto3")
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("pytz")
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import clean_data
+import webhook
+
+AUTH = "test-secret"
+
+@pytest.fixture
+def s3(fake_s3, monkeypatch):
+    monkeypatch.setattr(webhook, "s3_client", fake_s3)
+    monkeypatch.setattr(clean_data, "s3_client", fake_s3)
+    monkeypatch.setattr(webhook, "HELIUS_WEBHOOK_AUTH", AUTH)
+    return fake_s3
+
+def post(body, headers=None):
+    """POST body to the receiver through a local test client, standing in for Helius."""
+    async def run():
+        async with TestClient(TestServer(webhook.create_app())) as client:
+            response = await client.post(webhook.WEBHOOK_PATH, data=body, headers=headers or {})
+            return response.status, await response.json()
+    return asyncio.run(run())
+
+ENHANCED_BATCH = (
+    b'[{"description":"swap","type":"SWAP","source":"RAYDIUM","fee":5000,'
+    b'"feePayer":"Payer1","signature":"Sig1","slot":42,"timestamp":1700000000,'
+    b'"tokenTransfers":[{"fromUserAccount":"A","toUserAccount":"B",'
+    b'"tokenAmount":1.5,"mint":"Mint1","tokenStandard":"Fungible"}]}]'
+)
+
+@pytest.mark.parametrize("headers", [
+    {},
+    {"Authorization": "wrong"},
+    {"Authorization": "sécret"},
+])
+def test_rejects_bad_or_missing_auth(s3, headers):
+    status, _ = post(ENHANCED_BATCH, headers)
+    assert status == 401
+    assert s3.objects == {}
+
+@pytest.mark.parametrize("body", [b"{not json", b'{"signature":"Sig1"}', b'"text"', b"[1, 2]"])
+def test_rejects_invalid_body(s3, body):
+    status, _ = post(body, {"Authorization": AUTH})
+    assert status == 400
+    assert s3.objects == {}
+
+def test_stored_batch_is_flattened_by_clean_data(s3):
+    status, payload = post(ENHANCED_BATCH, {"Authorization": AUTH})
+    assert status == 200
+    assert payload == {"received": 1}
+
+    [(bucket, key)] = s3.objects
+    assert key.startswith(webhook.S3_DEST_PREFIX)
+    df, processed = clean_data.process_json_files(bucket, [key])
+    assert processed == [key]
+    row = df.iloc[0]
+    assert row["Type"] == "SWAP"
+    assert row["Source"] == "RAYDIUM"
+    assert row["Fee"] == 5000
+    assert row["Fee Payer"] == "Payer1"
+    assert row["Signature"] == "Sig1"
+    assert row["Mint"] == "Mint1"
+    assert row["Token Amount"] == 1.5
+
+def test_redelivered_batch_overwrites(s3):
+    post(ENHANCED_BATCH, {"Authorization": AUTH})
+    post(ENHANCED_BATCH, {"Authorization": AUTH})
+    assert len(s3.objects) == 1
+
+def test_storage_failure_returns_503(s3):
+    s3.fail_puts = True
+    status, _ = post(ENHANCED_BATCH, {"Authorization": AUTH})
+    assert status == 503